@@ -1,8 +1,11 @@
 from typing import Dict, List, Optional
-from pydantic import BaseModel
-from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel, model_validator
+from fastapi import Body, FastAPI, HTTPException
 import google.cloud.aiplatform as aiplatform
 from datetime import datetime
+from ..services.evidence import EvidencePipeline, estimate_tokens
+from ..services.escrow_store import validate_verifiable
+from ..services.monitor import ConditionMonitor
 
 class ContractClause(BaseModel):
     party_a: str
@@ -18,6 +21,26 @@ class VerifiableCondition(BaseModel):
     tracking_id: str
     status_api: str
 
+class MonitoredCondition(BaseModel):
+    """Condition accepted and reported by the condition monitor.
+
+    Only the reference field for the condition's type is set, see
+    services.escrow_store.REFERENCE_FIELDS.
+    """
+    type: str
+    provider: Optional[str] = None
+    tracking_id: Optional[str] = None
+    document_hash: Optional[str] = None
+    email_id: Optional[str] = None
+    oracle_id: Optional[str] = None
+    expected_value: Optional[str] = None
+    status_api: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_verifiable(self) -> "MonitoredCondition":
+        validate_verifiable(self.model_dump(exclude_none=True))
+        return self
+
 class EscrowContract(BaseModel):
     contract_id: str
     clauses: ContractClause
@@ -85,13 +108,16 @@ class ExecutionValidatorAgent:
         return all(await self.check_condition_status(v) for v in verifiables)
 
 class DisputeResolverAgent:
-    def __init__(self):
+    def __init__(self, evidence: Optional[EvidencePipeline] = None):
         self.model = aiplatform.TextGenerationModel.from_pretrained("gemini-pro")
+        self.evidence = evidence if evidence is not None else EvidencePipeline()
     
     async def resolve_dispute(self, dispute_data: Dict) -> Dict:
+        bundle = await self.evidence.assemble(dispute_data)
         prompt = f"""
-        Analyze the following dispute and suggest a resolution:
-        {dispute_data}
+        Analyze the following dispute and suggest a resolution.
+        Evidence, most relevant first:
+        {bundle.render()}
         
         Consider:
         1. Contract terms
@@ -103,12 +129,16 @@ class DisputeResolverAgent:
         response = self.model.predict(prompt)
         return {
             "resolution": "Suggested resolution",
-            "evidence": [],
-            "requires_human_review": False
+            "evidence": [item.to_dict() for item in bundle.items],
+            "requires_human_review": False,
+            "metrics": {**bundle.metrics(), "prompt_tokens": estimate_tokens(prompt)}
         }
 
 # FastAPI application setup
 app = FastAPI(title="Escrow AI Agent API")
+condition_monitor = ConditionMonitor()
+# Shared by every dispute so the evidence cache and in-flight fetches outlive a request
+evidence_pipeline = EvidencePipeline(store=condition_monitor.store)
 
 @app.post("/api/agent/draft")
 async def draft_contract(description: str):
@@ -120,15 +150,28 @@ async def generate_verifiables(contract: ContractClause):
     agent = VerifiablesGeneratorAgent()
     return await agent.generate_verifiables(contract)
 
+@app.post("/api/agent/monitor/{escrow_id}")
+async def start_monitoring(escrow_id: str, verifiables: List[MonitoredCondition] = Body(min_length=1)):
+    await condition_monitor.start_monitoring(
+        escrow_id, [v.model_dump(exclude_none=True) for v in verifiables]
+    )
+    return {"status": "monitoring", "escrow_id": escrow_id}
+
 @app.get("/api/agent/monitor/{escrow_id}")
 async def monitor_conditions(escrow_id: str):
-    validator = ExecutionValidatorAgent()
-    # Implementation would fetch verifiables for the escrow_id
-    return {"status": "monitoring"}
+    status = condition_monitor.get_monitoring_status(escrow_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Escrow {escrow_id} is not being monitored")
+    return status
+
+@app.delete("/api/agent/monitor/{escrow_id}")
+async def stop_monitoring(escrow_id: str):
+    await condition_monitor.stop_monitoring(escrow_id)
+    return {"status": "stopped", "escrow_id": escrow_id}
 
 @app.post("/api/agent/dispute")
 async def resolve_dispute(dispute_data: Dict):
-    agent = DisputeResolverAgent()
+    agent = DisputeResolverAgent(evidence=evidence_pipeline)
     return await agent.resolve_dispute(dispute_data)
 
 @app.post("/api/agent/escalate/{escrow_id}")
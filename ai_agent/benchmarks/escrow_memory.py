@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import gc
+import tracemalloc
+from typing import Dict, List
+
+from ..services.escrow_store import EscrowStore
+
+PROVIDERS = ["fedex", "ups", "dhl", "usps"]
+
+
+def _fresh(value: str) -> str:
+    # Values decoded from API payloads are new string objects, never shared
+    return "".join(list(value))
+
+
+def make_verifiables(index: int) -> List[Dict]:
+    """Build the verifiables for one escrow in the shape the monitor receives"""
+    return [
+        {
+            "type": _fresh("shipment"),
+            "provider": _fresh(PROVIDERS[index % len(PROVIDERS)]),
+            "tracking_id": f"TRK{index:010d}",
+            "status_api": _fresh("https://api.shipping.com/v1/track"),
+        },
+        {
+            "type": _fresh("document"),
+            "document_hash": f"{index:064x}",
+        },
+        {
+            "type": _fresh("oracle"),
+            "oracle_id": f"oracle-{index % 16}",
+            "expected_value": _fresh("delivered"),
+        },
+    ]
+
+
+async def _legacy_monitor(escrow_id: str, verifiables: List[Dict]):
+    # Stand-in for the old per-escrow polling loop, parked between checks
+    await asyncio.sleep(3600)
+
+
+def measure_legacy(count: int) -> int:
+    """Bytes held by a task and a closure of dicts per escrow"""
+    async def run() -> int:
+        gc.collect()
+        tracemalloc.start()
+        start, _ = tracemalloc.get_traced_memory()
+        monitors = {}
+        for index in range(count):
+            escrow_id = f"escrow-{index}"
+            monitors[escrow_id] = asyncio.create_task(
+                _legacy_monitor(escrow_id, make_verifiables(index))
+            )
+        await asyncio.sleep(0)
+        used = tracemalloc.get_traced_memory()[0] - start
+        tracemalloc.stop()
+        for task in monitors.values():
+            task.cancel()
+        await asyncio.gather(*monitors.values(), return_exceptions=True)
+        return used
+
+    return asyncio.run(run())
+
+
+def measure_store(count: int) -> int:
+    """Bytes held by the compact escrow store"""
+    gc.collect()
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    store = EscrowStore()
+    for index in range(count):
+        store.add(f"escrow-{index}", make_verifiables(index))
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    assert len(store) == count
+    return used
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report bytes per monitored escrow")
+    parser.add_argument("--escrows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    legacy = measure_legacy(args.escrows)
+    compact = measure_store(args.escrows)
+    print(f"escrows:           {args.escrows}")
+    print(f"before (tasks):    {legacy / args.escrows:8.1f} bytes/escrow")
+    print(f"after (store):     {compact / args.escrows:8.1f} bytes/escrow")
+    print(f"reduction:         {100 * (1 - compact / legacy):8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
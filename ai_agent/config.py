@@ -25,6 +25,13 @@ class Config:
     
     # Monitoring Configuration
     POLLING_INTERVAL = int(os.getenv("POLLING_INTERVAL", "300"))  # 5 minutes
+    MONITOR_CONCURRENCY = int(os.getenv("MONITOR_CONCURRENCY", "100"))  # escrows checked at once
+    MONITOR_CHECK_TIMEOUT = float(os.getenv("MONITOR_CHECK_TIMEOUT", "60"))  # seconds per escrow check
+    
+    # Dispute Evidence Configuration
+    DISPUTE_PROMPT_TOKEN_BUDGET = int(os.getenv("DISPUTE_PROMPT_TOKEN_BUDGET", "4000"))
+    EVIDENCE_FETCH_TIMEOUT = float(os.getenv("EVIDENCE_FETCH_TIMEOUT", "10"))  # seconds per source
+    EVIDENCE_CACHE_TTL = int(os.getenv("EVIDENCE_CACHE_TTL", "60"))  # seconds
     
     # Logging Configuration
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -0,0 +1,256 @@
+import heapq
+import sys
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+# Escrow status codes kept in the compact status column
+ESCROW_FREE = 0
+ESCROW_WAITING = 1
+ESCROW_CHECKING = 2
+
+STATUS_NAMES = {
+    ESCROW_FREE: "free",
+    ESCROW_WAITING: "monitoring",
+    ESCROW_CHECKING: "checking",
+}
+
+# Field holding the identifier each condition type is checked against
+REFERENCE_FIELDS = {
+    "shipment": "tracking_id",
+    "document": "document_hash",
+    "email": "email_id",
+    "oracle": "oracle_id",
+}
+
+
+def validate_verifiable(verifiable: Dict):
+    """Raise ValueError unless the condition can actually be checked by the monitor"""
+    condition_type = verifiable.get("type")
+    if condition_type not in REFERENCE_FIELDS:
+        raise ValueError(f"Unsupported condition type: {condition_type!r}")
+    required = [REFERENCE_FIELDS[condition_type]]
+    if condition_type == "shipment":
+        required.append("provider")
+    elif condition_type == "oracle":
+        required.append("expected_value")
+    missing = [field for field in required if not verifiable.get(field)]
+    if missing:
+        raise ValueError(f"{condition_type} condition is missing {', '.join(missing)}")
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class CompactVerifiable:
+    """Slotted, read-only view of a verifiable condition"""
+
+    __slots__ = ("type", "provider", "ref", "expected_value", "status_api")
+
+    def __init__(self, type: str, provider: Optional[str], ref: Optional[str],
+                 expected_value: Optional[str] = None, status_api: Optional[str] = None):
+        # Types, providers and status endpoints repeat across the fleet, so
+        # interning them keeps a single copy of each string in memory
+        self.type = _intern(type)
+        self.provider = _intern(provider)
+        self.ref = ref
+        self.expected_value = expected_value
+        self.status_api = _intern(status_api)
+
+    @classmethod
+    def from_dict(cls, verifiable: Dict) -> "CompactVerifiable":
+        condition_type = verifiable["type"]
+        ref_field = REFERENCE_FIELDS.get(condition_type, "tracking_id")
+        return cls(
+            type=condition_type,
+            provider=verifiable.get("provider"),
+            ref=verifiable.get(ref_field),
+            expected_value=verifiable.get("expected_value"),
+            status_api=verifiable.get("status_api"),
+        )
+
+    def to_dict(self) -> Dict:
+        """Rebuild the plain dict shape the monitor was originally given"""
+        data = {"type": self.type, REFERENCE_FIELDS.get(self.type, "tracking_id"): self.ref}
+        if self.provider is not None:
+            data["provider"] = self.provider
+        if self.expected_value is not None:
+            data["expected_value"] = self.expected_value
+        if self.status_api is not None:
+            data["status_api"] = self.status_api
+        return data
+
+    def to_condition(self):
+        """Materialize a pydantic MonitoredCondition for API responses"""
+        # Imported lazily so the store stays usable without the agent stack loaded
+        from ..agents.main import MonitoredCondition
+
+        return MonitoredCondition(**self.to_dict())
+
+
+class EscrowStore:
+    """Struct-of-arrays store for the escrows being monitored.
+
+    Each escrow occupies one slot; its status, next check time and generation
+    live in typed arrays rather than per-escrow objects, and freed slots are
+    reused. The generation changes on every registration, so a check started
+    for an earlier registration of the same escrow id can be told apart.
+    """
+
+    def __init__(self):
+        self._slots: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._verifiables: List[Optional[Tuple[CompactVerifiable, ...]]] = []
+        self._status = array("B")
+        self._next_check = array("d")
+        self._generation = array("Q")
+        # Sequence number of the one live schedule entry of each waiting escrow
+        self._entry = array("Q")
+        self._free: List[int] = []
+        self._last_generation = 0
+        self._last_entry = 0
+        # (next_check, entry, slot) for waiting escrows; entries for removed or
+        # rescheduled escrows are left in place and dropped when they surface
+        self._schedule: List[Tuple[float, int, int]] = []
+        self._stale = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, escrow_id: str) -> bool:
+        return escrow_id in self._slots
+
+    def add(self, escrow_id: str, verifiables: List[Dict], next_check: float = 0.0) -> int:
+        """Register an escrow and its verifiable conditions, returning its generation.
+
+        Raises ValueError for an empty or unverifiable condition list, since an
+        escrow with nothing to check would be released on its first check.
+        """
+        if escrow_id in self._slots:
+            raise ValueError(f"Escrow {escrow_id} is already stored")
+        if not verifiables:
+            raise ValueError(f"Escrow {escrow_id} has no verifiable conditions")
+        for verifiable in verifiables:
+            validate_verifiable(verifiable)
+
+        compact = tuple(CompactVerifiable.from_dict(v) for v in verifiables)
+        self._last_generation += 1
+        generation = self._last_generation
+        if self._free:
+            slot = self._free.pop()
+            self._ids[slot] = escrow_id
+            self._verifiables[slot] = compact
+            self._status[slot] = ESCROW_WAITING
+            self._next_check[slot] = next_check
+            self._generation[slot] = generation
+        else:
+            slot = len(self._ids)
+            self._ids.append(escrow_id)
+            self._verifiables.append(compact)
+            self._status.append(ESCROW_WAITING)
+            self._next_check.append(next_check)
+            self._generation.append(generation)
+            self._entry.append(0)
+        self._slots[escrow_id] = slot
+        self._push(slot, next_check)
+        return generation
+
+    def remove(self, escrow_id: str, generation: Optional[int] = None) -> bool:
+        """Drop an escrow, returning False if it was not stored.
+
+        When a generation is given, only that registration of the escrow is removed.
+        """
+        slot = self._current_slot(escrow_id, generation)
+        if slot is None:
+            return False
+        was_waiting = self._status[slot] == ESCROW_WAITING
+        del self._slots[escrow_id]
+        self._ids[slot] = None
+        self._verifiables[slot] = None
+        self._status[slot] = ESCROW_FREE
+        self._next_check[slot] = 0.0
+        self._free.append(slot)
+        if was_waiting:
+            self._mark_stale()
+        return True
+
+    def is_current(self, escrow_id: str, generation: int) -> bool:
+        """Whether the escrow is still stored under the given registration"""
+        return self._current_slot(escrow_id, generation) is not None
+
+    def verifiables(self, escrow_id: str) -> Tuple[CompactVerifiable, ...]:
+        return self._verifiables[self._slots[escrow_id]]
+
+    def status(self, escrow_id: str) -> str:
+        return STATUS_NAMES[self._status[self._slots[escrow_id]]]
+
+    def next_check(self, escrow_id: str) -> float:
+        return self._next_check[self._slots[escrow_id]]
+
+    def reschedule(self, escrow_id: str, next_check: float, generation: Optional[int] = None):
+        """Put an escrow back in the waiting state; no-op if it was removed or re-registered"""
+        slot = self._current_slot(escrow_id, generation)
+        if slot is None:
+            return
+        was_waiting = self._status[slot] == ESCROW_WAITING
+        if was_waiting and self._next_check[slot] == next_check:
+            return
+        self._status[slot] = ESCROW_WAITING
+        self._next_check[slot] = next_check
+        self._push(slot, next_check)
+        if was_waiting:
+            self._mark_stale()
+
+    def pop_due(self, now: float) -> Tuple[List[Tuple[str, int]], Optional[float]]:
+        """Claim the escrows due for a check and return the earliest future check time.
+
+        Claimed escrows are returned as (escrow_id, generation) pairs and stay in
+        the checking state until they are rescheduled or removed.
+        """
+        due = []
+        schedule = self._schedule
+        while schedule:
+            when, entry, slot = schedule[0]
+            if not self._is_live(when, entry, slot):
+                heapq.heappop(schedule)
+                self._stale -= 1
+                continue
+            if when > now:
+                return due, when
+            heapq.heappop(schedule)
+            self._status[slot] = ESCROW_CHECKING
+            due.append((self._ids[slot], self._generation[slot]))
+        return due, None
+
+    def materialize(self, escrow_id: str) -> Dict:
+        """Build the API-facing view of an escrow, including pydantic conditions"""
+        return {
+            "escrow_id": escrow_id,
+            "status": self.status(escrow_id),
+            "verifiables": [v.to_condition() for v in self.verifiables(escrow_id)],
+        }
+
+    def _current_slot(self, escrow_id: str, generation: Optional[int]) -> Optional[int]:
+        slot = self._slots.get(escrow_id)
+        if slot is None or (generation is not None and self._generation[slot] != generation):
+            return None
+        return slot
+
+    def _push(self, slot: int, next_check: float):
+        # A fresh sequence number retires any earlier entry for the slot, so a
+        # waiting escrow never has more than one live entry
+        self._last_entry += 1
+        self._entry[slot] = self._last_entry
+        heapq.heappush(self._schedule, (next_check, self._last_entry, slot))
+
+    def _is_live(self, when: float, entry: int, slot: int) -> bool:
+        return self._status[slot] == ESCROW_WAITING and self._entry[slot] == entry
+
+    def _mark_stale(self):
+        # Rebuild the schedule once stale entries outnumber live ones, so churn
+        # from stopped escrows cannot grow it without bound
+        self._stale += 1
+        if self._stale > len(self._schedule) // 2:
+            self._schedule = [entry for entry in self._schedule if self._is_live(*entry)]
+            heapq.heapify(self._schedule)
+            self._stale = 0
@@ -0,0 +1,287 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from ..utils.external_apis import ExternalAPIs
+from ..config import Config
+from .escrow_store import CompactVerifiable, EscrowStore
+
+logger = logging.getLogger(__name__)
+
+# Lower rank is packed first when the prompt budget is tight
+SOURCE_RANKS = {
+    "claim": 0,
+    "contract": 1,
+    "verifiable": 2,
+    "chain_event": 3,
+    "communication": 4,
+}
+
+# Items cut short to fit the budget end with this marker
+TRUNCATION_MARKER = " ...[truncated]"
+
+# Below this many tokens left, an oversized item is dropped rather than truncated
+MIN_TRUNCATED_TOKENS = 32
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def _piece_tokens(piece: str) -> int:
+    return 1 + (len(piece) - 1) // 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate: one per punctuation mark, ~one per 4 chars of a word"""
+    return sum(_piece_tokens(piece) for piece in _TOKEN_RE.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text so that it, plus the truncation marker, fits in max_tokens.
+
+    Budgets too small to hold the marker get a hard cut without it.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    marker = TRUNCATION_MARKER if max_tokens > estimate_tokens(TRUNCATION_MARKER) else ""
+    budget = max_tokens - estimate_tokens(marker)
+    end = 0
+    for match in _TOKEN_RE.finditer(text):
+        budget -= _piece_tokens(match.group())
+        if budget < 0:
+            break
+        end = match.end()
+    return text[:end] + marker
+
+
+class EvidenceItem:
+    """A single piece of evidence rendered into the dispute prompt"""
+
+    __slots__ = ("source", "content", "timestamp", "tokens")
+
+    def __init__(self, source: str, content: str, timestamp: Optional[str] = None):
+        self.source = source
+        self.content = content
+        self.timestamp = timestamp
+        self.tokens = estimate_tokens(content)
+
+    @classmethod
+    def from_record(cls, source: str, record) -> "EvidenceItem":
+        if isinstance(record, str):
+            return cls(source, record)
+        timestamp = record.get("timestamp") if isinstance(record, dict) else None
+        return cls(source, json.dumps(record, sort_keys=True, default=str), timestamp)
+
+    def truncated(self, max_tokens: int) -> "EvidenceItem":
+        return EvidenceItem(self.source, truncate_to_tokens(self.content, max_tokens), self.timestamp)
+
+    def fingerprint(self) -> str:
+        normalized = " ".join(self.content.lower().split())
+        return hashlib.sha1(normalized.encode()).hexdigest()
+
+    def to_dict(self) -> Dict:
+        return {"source": self.source, "content": self.content, "timestamp": self.timestamp}
+
+
+class EvidenceBundle:
+    """Evidence packed for one dispute, with assembly metrics"""
+
+    def __init__(self, items: List[EvidenceItem], dropped: int, truncated: int, assembly_seconds: float):
+        self.items = items
+        self.dropped = dropped
+        self.truncated = truncated
+        self.assembly_seconds = assembly_seconds
+        self.tokens = sum(item.tokens for item in items)
+
+    def render(self) -> str:
+        return "\n".join(f"[{item.source}] {item.content}" for item in self.items)
+
+    def metrics(self) -> Dict:
+        return {
+            "assembly_ms": round(self.assembly_seconds * 1000, 2),
+            "evidence_tokens": self.tokens,
+            "evidence_items": len(self.items),
+            "evidence_dropped": self.dropped,
+            "evidence_truncated": self.truncated,
+        }
+
+
+class EvidenceCache:
+    """TTL cache that also shares in-flight fetches between concurrent disputes.
+
+    Entries are kept in insertion order; since they all share one TTL, that is
+    also expiry order, so expired and overflow entries are evicted from the front.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 10_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Tuple[float, asyncio.Future]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_fetch(self, key: Tuple, fetch: Callable[[], Awaitable]):
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            return await asyncio.shield(entry[1])
+
+        self._entries.pop(key, None)
+        self._evict(now)
+        future = asyncio.ensure_future(fetch())
+        self._entries[key] = (now + self.ttl, future)
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            # Failed fetches are retried by the next dispute rather than cached
+            if self._entries.get(key, (None, None))[1] is future:
+                del self._entries[key]
+            raise
+
+    def _evict(self, now: float):
+        # Drop expired entries, then the oldest ones until there is room for one more
+        entries = self._entries
+        while entries and next(iter(entries.values()))[0] <= now:
+            entries.popitem(last=False)
+        while len(entries) >= self.max_entries:
+            entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class EvidencePipeline:
+    """Gathers, deduplicates, ranks and packs dispute evidence into a token budget"""
+
+    def __init__(self, store: Optional[EscrowStore] = None, token_budget: Optional[int] = None,
+                 cache: Optional[EvidenceCache] = None):
+        self.store = store
+        self.token_budget = token_budget if token_budget is not None else Config.DISPUTE_PROMPT_TOKEN_BUDGET
+        self.cache = cache if cache is not None else EvidenceCache(Config.EVIDENCE_CACHE_TTL)
+
+    async def assemble(self, dispute_data: Dict) -> EvidenceBundle:
+        """Fetch every evidence source concurrently and pack the result"""
+        started = time.perf_counter()
+        escrow_id = str(dispute_data.get("escrow_id", ""))
+
+        fetches = [
+            self._claim_evidence(dispute_data),
+            self._contract_evidence(dispute_data),
+            self._verifiable_evidence(escrow_id, dispute_data),
+            self._escrow_evidence("chain_event", escrow_id, ExternalAPIs.get_chain_events),
+            self._escrow_evidence("communication", escrow_id, ExternalAPIs.get_communications),
+        ]
+        results = await asyncio.gather(*fetches, return_exceptions=True)
+
+        items = []
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Error gathering evidence for escrow {escrow_id}: {str(result)}")
+                continue
+            items.extend(result)
+
+        packed, dropped, truncated = self._pack(self._rank(self._deduplicate(items)))
+        bundle = EvidenceBundle(packed, dropped, truncated, time.perf_counter() - started)
+        logger.info(
+            f"Assembled evidence for escrow {escrow_id}: {bundle.tokens} tokens, "
+            f"{len(packed)} items ({truncated} truncated), {dropped} dropped "
+            f"in {bundle.assembly_seconds * 1000:.1f} ms"
+        )
+        return bundle
+
+    async def _claim_evidence(self, dispute_data: Dict) -> List[EvidenceItem]:
+        claim = {
+            key: value for key, value in dispute_data.items()
+            if key not in ("contract", "verifiables")
+        }
+        return [EvidenceItem.from_record("claim", claim)] if claim else []
+
+    async def _contract_evidence(self, dispute_data: Dict) -> List[EvidenceItem]:
+        contract = dispute_data.get("contract")
+        return [EvidenceItem.from_record("contract", contract)] if contract else []
+
+    async def _verifiable_evidence(self, escrow_id: str, dispute_data: Dict) -> List[EvidenceItem]:
+        if self.store is not None and escrow_id in self.store:
+            verifiables = self.store.verifiables(escrow_id)
+        else:
+            verifiables = [CompactVerifiable.from_dict(v) for v in dispute_data.get("verifiables", [])]
+
+        statuses = await asyncio.gather(
+            *(self._fetch_verifiable_status(v) for v in verifiables),
+            return_exceptions=True
+        )
+        items = []
+        for verifiable, status in zip(verifiables, statuses):
+            if isinstance(status, Exception):
+                status = {"error": str(status)}
+            record = {"type": verifiable.type, "reference": verifiable.ref, "status": status}
+            items.append(EvidenceItem.from_record("verifiable", record))
+        return items
+
+    async def _fetch_verifiable_status(self, verifiable: CompactVerifiable) -> Dict:
+        condition_type = verifiable.type
+        key = (condition_type, verifiable.ref)
+        if condition_type == "shipment":
+            # Tracking ids are only unique per carrier
+            key += (verifiable.provider,)
+            fetch = lambda: ExternalAPIs.check_shipment_status(verifiable.ref, verifiable.provider)
+        elif condition_type == "document":
+            fetch = lambda: ExternalAPIs.verify_document(verifiable.ref)
+        elif condition_type == "email":
+            fetch = lambda: ExternalAPIs.check_email_confirmation(verifiable.ref)
+        elif condition_type == "oracle":
+            fetch = lambda: ExternalAPIs.get_oracle_data(verifiable.ref)
+        else:
+            return {"status": "unknown condition type"}
+
+        return await self._cached("verifiable", key, fetch)
+
+    async def _escrow_evidence(self, source: str, escrow_id: str,
+                               fetch: Callable[[str], Awaitable[List[Dict]]]) -> List[EvidenceItem]:
+        if not escrow_id:
+            return []
+        records = await self._cached(source, (escrow_id,), lambda: fetch(escrow_id))
+        return [EvidenceItem.from_record(source, record) for record in records]
+
+    async def _cached(self, source: str, key: Tuple, fetch: Callable[[], Awaitable]):
+        async def fetch_with_timeout():
+            return await asyncio.wait_for(fetch(), Config.EVIDENCE_FETCH_TIMEOUT)
+
+        return await self.cache.get_or_fetch((source,) + key, fetch_with_timeout)
+
+    def _deduplicate(self, items: List[EvidenceItem]) -> List[EvidenceItem]:
+        seen = set()
+        unique = []
+        for item in items:
+            fingerprint = item.fingerprint()
+            if fingerprint not in seen:
+                seen.add(fingerprint)
+                unique.append(item)
+        return unique
+
+    def _rank(self, items: List[EvidenceItem]) -> List[EvidenceItem]:
+        # Most relevant source first; within a source, newest evidence first
+        items = sorted(items, key=lambda item: item.timestamp or "", reverse=True)
+        return sorted(items, key=lambda item: SOURCE_RANKS.get(item.source, len(SOURCE_RANKS)))
+
+    def _pack(self, items: List[EvidenceItem]) -> Tuple[List[EvidenceItem], int, int]:
+        """Fill the budget in rank order, truncating items that do not fit.
+
+        The claim is always kept so the prompt says what the dispute is about.
+        """
+        packed = []
+        truncated = 0
+        remaining = self.token_budget
+        for item in items:
+            if item.tokens > remaining:
+                if item.source != "claim" and remaining < MIN_TRUNCATED_TOKENS:
+                    continue
+                item = item.truncated(remaining)
+                truncated += 1
+            packed.append(item)
+            remaining -= item.tokens
+        return packed, len(items) - len(packed), truncated
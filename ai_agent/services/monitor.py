@@ -1,83 +1,137 @@
 import asyncio
 import logging
-from typing import Dict, List
+import time
+from typing import Dict, List, Optional, Sequence, Set
 from ..utils.external_apis import ExternalAPIs
 from ..config import Config
+from .escrow_store import CompactVerifiable, EscrowStore
 
 logger = logging.getLogger(__name__)
 
 class ConditionMonitor:
-    def __init__(self):
-        self.active_monitors: Dict[str, asyncio.Task] = {}
+    def __init__(self, store: Optional[EscrowStore] = None):
+        # All monitored escrows share one compact store and one scheduler task
+        # instead of a task and a closure of dicts per escrow
+        self.store = store if store is not None else EscrowStore()
+        self._scheduler: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._check_slots = asyncio.Semaphore(Config.MONITOR_CONCURRENCY)
+        self._checks: Set[asyncio.Task] = set()
     
     async def start_monitoring(self, escrow_id: str, verifiables: List[Dict]):
         """Start monitoring verifiable conditions for an escrow"""
-        if escrow_id in self.active_monitors:
+        if escrow_id in self.store:
             logger.warning(f"Already monitoring escrow {escrow_id}")
             return
         
-        monitor_task = asyncio.create_task(
-            self._monitor_conditions(escrow_id, verifiables)
-        )
-        self.active_monitors[escrow_id] = monitor_task
+        self.store.add(escrow_id, verifiables, next_check=time.monotonic())
+        self._wakeup.set()
+        if self._scheduler is None or self._scheduler.done():
+            self._scheduler = asyncio.create_task(self._run_scheduler())
     
     async def stop_monitoring(self, escrow_id: str):
         """Stop monitoring verifiable conditions for an escrow"""
-        if escrow_id in self.active_monitors:
-            self.active_monitors[escrow_id].cancel()
-            del self.active_monitors[escrow_id]
+        # A check already running for this escrow sees the registration is gone
+        # and neither releases funds nor reschedules
+        if self.store.remove(escrow_id):
+            self._wakeup.set()
+            logger.info(f"Monitoring stopped for escrow {escrow_id}")
     
-    async def _monitor_conditions(self, escrow_id: str, verifiables: List[Dict]):
-        """Continuously monitor verifiable conditions"""
-        while True:
+    def get_monitoring_status(self, escrow_id: str) -> Optional[Dict]:
+        """Materialize the API view of a monitored escrow"""
+        if escrow_id not in self.store:
+            return None
+        return self.store.materialize(escrow_id)
+    
+    async def _run_scheduler(self):
+        """Dispatch due escrow checks until nothing is left to monitor"""
+        while len(self.store):
+            self._wakeup.clear()
+            due, next_wakeup = self.store.pop_due(time.monotonic())
+            
+            for escrow_id, generation in due:
+                # Each check runs in its own task, so a slow escrow only holds
+                # one of the MONITOR_CONCURRENCY slots
+                await self._check_slots.acquire()
+                task = asyncio.create_task(self._monitor_conditions(escrow_id, generation))
+                self._checks.add(task)
+                task.add_done_callback(self._check_done)
+            
+            timeout = Config.POLLING_INTERVAL
+            if next_wakeup is not None:
+                timeout = max(0.0, next_wakeup - time.monotonic())
             try:
-                all_conditions_met = await self._check_all_conditions(verifiables)
-                if all_conditions_met:
-                    await self._trigger_fund_release(escrow_id)
-                    break
-                
-                await asyncio.sleep(Config.POLLING_INTERVAL)
-            except asyncio.CancelledError:
-                logger.info(f"Monitoring stopped for escrow {escrow_id}")
-                break
-            except Exception as e:
-                logger.error(f"Error monitoring escrow {escrow_id}: {str(e)}")
-                await asyncio.sleep(Config.POLLING_INTERVAL)
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+    
+    def _check_done(self, task: asyncio.Task):
+        self._checks.discard(task)
+        self._check_slots.release()
     
-    async def _check_all_conditions(self, verifiables: List[Dict]) -> bool:
+    async def _monitor_conditions(self, escrow_id: str, generation: int):
+        """Run one check of an escrow's verifiable conditions"""
+        if not self.store.is_current(escrow_id, generation):
+            # Escrow was stopped while its check was waiting for a slot
+            return
+        
+        try:
+            all_conditions_met = await asyncio.wait_for(
+                self._check_all_conditions(self.store.verifiables(escrow_id)),
+                Config.MONITOR_CHECK_TIMEOUT
+            )
+            if all_conditions_met and self.store.is_current(escrow_id, generation):
+                await self._trigger_fund_release(escrow_id)
+                self.store.remove(escrow_id, generation)
+                return
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out checking conditions for escrow {escrow_id}")
+        except Exception as e:
+            logger.error(f"Error monitoring escrow {escrow_id}: {str(e)}")
+        
+        # No-op when the escrow was stopped or re-registered during the check
+        self.store.reschedule(escrow_id, time.monotonic() + Config.POLLING_INTERVAL, generation)
+        self._wakeup.set()
+    
+    async def _check_all_conditions(self, verifiables: Sequence[CompactVerifiable]) -> bool:
         """Check if all verifiable conditions are met"""
         for verifiable in verifiables:
-            condition_type = verifiable["type"]
+            condition_type = verifiable.type
             
             try:
                 if condition_type == "shipment":
                     status = await ExternalAPIs.check_shipment_status(
-                        verifiable["tracking_id"],
-                        verifiable["provider"]
+                        verifiable.ref,
+                        verifiable.provider
                     )
                     if status["status"] != "delivered":
                         return False
                 
                 elif condition_type == "document":
                     verification = await ExternalAPIs.verify_document(
-                        verifiable["document_hash"]
+                        verifiable.ref
                     )
                     if not verification["verified"]:
                         return False
                 
                 elif condition_type == "email":
                     confirmation = await ExternalAPIs.check_email_confirmation(
-                        verifiable["email_id"]
+                        verifiable.ref
                     )
                     if confirmation["status"] != "confirmed":
                         return False
                 
                 elif condition_type == "oracle":
                     data = await ExternalAPIs.get_oracle_data(
-                        verifiable["oracle_id"]
+                        verifiable.ref
                     )
-                    if not self._validate_oracle_data(data, verifiable["expected_value"]):
+                    if not self._validate_oracle_data(data, verifiable.expected_value):
                         return False
+                
+                else:
+                    # An unrecognised condition must never count as met
+                    logger.error(f"Unknown condition type {condition_type}")
+                    return False
             
             except Exception as e:
                 logger.error(f"Error checking condition {condition_type}: {str(e)}")
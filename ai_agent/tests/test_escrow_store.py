@@ -0,0 +1,106 @@
+import pytest
+from ai_agent.services.escrow_store import EscrowStore, CompactVerifiable
+
+VERIFIABLES = [
+    {"type": "shipment", "provider": "fedex", "tracking_id": "TRK1"},
+    {"type": "oracle", "oracle_id": "oracle-1", "expected_value": "delivered"},
+]
+
+def test_add_and_read_back():
+    store = EscrowStore()
+    store.add("escrow-1", VERIFIABLES, next_check=10.0)
+    assert "escrow-1" in store
+    assert len(store) == 1
+    assert store.status("escrow-1") == "monitoring"
+    assert store.next_check("escrow-1") == 10.0
+    assert [v.to_dict() for v in store.verifiables("escrow-1")] == VERIFIABLES
+
+def test_duplicate_escrow_rejected():
+    store = EscrowStore()
+    store.add("escrow-1", VERIFIABLES)
+    with pytest.raises(ValueError):
+        store.add("escrow-1", VERIFIABLES)
+
+def test_unverifiable_conditions_rejected():
+    store = EscrowStore()
+    for verifiables in (
+        [],
+        [{"type": "whatever"}],
+        [{"type": "shipment", "tracking_id": "TRK1"}],
+        [{"type": "document"}],
+        [{"type": "oracle", "oracle_id": "oracle-1"}],
+    ):
+        with pytest.raises(ValueError):
+            store.add("escrow-1", verifiables)
+    assert len(store) == 0
+
+def test_provider_and_type_strings_interned():
+    a = CompactVerifiable.from_dict({"type": "".join("shipment"), "provider": "".join("fedex"), "tracking_id": "1"})
+    b = CompactVerifiable.from_dict({"type": "".join("shipment"), "provider": "".join("fedex"), "tracking_id": "2"})
+    assert a.type is b.type
+    assert a.provider is b.provider
+
+def test_pop_due_claims_escrows_in_order():
+    store = EscrowStore()
+    later = store.add("later", VERIFIABLES, next_check=50.0)
+    first = store.add("first", VERIFIABLES, next_check=1.0)
+    second = store.add("second", VERIFIABLES, next_check=5.0)
+    assert store.pop_due(10.0) == ([("first", first), ("second", second)], 50.0)
+    assert store.status("first") == "checking"
+    # Claimed escrows are not handed out again until rescheduled
+    assert store.pop_due(10.0) == ([], 50.0)
+    store.reschedule("first", 8.0, first)
+    assert store.pop_due(60.0) == ([("first", first), ("later", later)], None)
+
+def test_removed_escrow_is_not_due():
+    store = EscrowStore()
+    store.add("escrow-1", VERIFIABLES, next_check=1.0)
+    assert store.remove("escrow-1")
+    assert not store.remove("escrow-1")
+    store.reschedule("escrow-1", 2.0)
+    assert len(store) == 0
+    assert store.pop_due(5.0) == ([], None)
+
+def test_removed_slot_is_reused():
+    store = EscrowStore()
+    for index in range(3):
+        store.add(f"escrow-{index}", VERIFIABLES, next_check=1.0)
+    store.remove("escrow-1")
+    generation = store.add("escrow-3", VERIFIABLES, next_check=2.0)
+    assert len(store) == 3
+    due, _ = store.pop_due(5.0)
+    assert [escrow_id for escrow_id, _ in due] == ["escrow-0", "escrow-2", "escrow-3"]
+    assert ("escrow-3", generation) in due
+
+def test_stale_generation_is_ignored():
+    store = EscrowStore()
+    old = store.add("escrow-1", VERIFIABLES, next_check=1.0)
+    store.pop_due(5.0)
+    store.remove("escrow-1")
+    new = store.add("escrow-1", VERIFIABLES, next_check=3.0)
+    assert new != old
+    assert not store.is_current("escrow-1", old)
+    assert store.is_current("escrow-1", new)
+
+    store.reschedule("escrow-1", 100.0, old)
+    assert not store.remove("escrow-1", old)
+    assert store.next_check("escrow-1") == 3.0
+    assert store.pop_due(5.0) == ([("escrow-1", new)], None)
+
+def test_churn_does_not_disturb_schedule():
+    store = EscrowStore()
+    kept = store.add("kept", VERIFIABLES, next_check=1.0)
+    for index in range(1000):
+        store.add(f"escrow-{index}", VERIFIABLES, next_check=float(index))
+        store.remove(f"escrow-{index}")
+        store.reschedule("kept", float(index % 7), kept)
+    assert len(store) == 1
+    assert store.pop_due(10.0) == ([("kept", kept)], None)
+
+def test_reschedule_back_and_forth_claims_once():
+    store = EscrowStore()
+    generation = store.add("escrow-1", VERIFIABLES, next_check=1.0)
+    store.reschedule("escrow-1", 2.0, generation)
+    store.reschedule("escrow-1", 1.0, generation)
+    assert store.pop_due(5.0) == ([("escrow-1", generation)], None)
+    assert store.pop_due(5.0) == ([], None)
@@ -0,0 +1,147 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+from ai_agent.services.evidence import TRUNCATION_MARKER, EvidenceCache, EvidencePipeline, estimate_tokens
+from ai_agent.utils.external_apis import ExternalAPIs
+
+DISPUTE = {
+    "escrow_id": "escrow-1",
+    "reason": "Goods never arrived",
+    "contract": {"party_a": "Alice", "party_b": "Bob", "amount": 10.0},
+    "verifiables": [{"type": "shipment", "provider": "fedex", "tracking_id": "TRK1"}],
+}
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("ship it, now") == 4
+    assert estimate_tokens("a" * 40) == 10
+
+@patch.object(ExternalAPIs, "get_communications", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "get_chain_events", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "check_shipment_status", new_callable=AsyncMock)
+def test_assemble_ranks_and_deduplicates(mock_shipment, mock_events, mock_messages):
+    mock_shipment.return_value = {"status": "in_transit"}
+    mock_events.return_value = [{"event": "Funded", "timestamp": "2024-04-01"}]
+    mock_messages.return_value = [
+        {"from": "Bob", "body": "Shipped", "timestamp": "2024-04-02"},
+        {"from": "Bob", "body": "Shipped", "timestamp": "2024-04-02"},
+    ]
+
+    bundle = asyncio.run(EvidencePipeline(token_budget=1000).assemble(DISPUTE))
+
+    assert [item.source for item in bundle.items] == [
+        "claim", "contract", "verifiable", "chain_event", "communication"
+    ]
+    assert "in_transit" in bundle.render()
+    assert bundle.metrics()["evidence_tokens"] == bundle.tokens <= 1000
+
+@patch.object(ExternalAPIs, "get_communications", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "get_chain_events", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "check_shipment_status", new_callable=AsyncMock)
+def test_assemble_respects_token_budget(mock_shipment, mock_events, mock_messages):
+    mock_shipment.side_effect = Exception("carrier down")
+    mock_events.return_value = []
+    mock_messages.return_value = [{"body": "word " * 500}]
+
+    bundle = asyncio.run(EvidencePipeline(token_budget=200).assemble(DISPUTE))
+
+    assert bundle.tokens <= 200
+    assert bundle.dropped == 0
+    assert bundle.truncated == 1
+    assert bundle.items[-1].source == "communication"
+    assert bundle.items[-1].content.endswith(TRUNCATION_MARKER)
+    assert "carrier down" in bundle.render()
+
+@patch.object(ExternalAPIs, "get_communications", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "get_chain_events", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "check_shipment_status", new_callable=AsyncMock)
+def test_long_claim_is_truncated_not_dropped(mock_shipment, mock_events, mock_messages):
+    mock_shipment.return_value = {"status": "in_transit"}
+    mock_events.return_value = []
+    mock_messages.return_value = []
+    dispute = {**DISPUTE, "reason": "word " * 500}
+
+    bundle = asyncio.run(EvidencePipeline(token_budget=100).assemble(dispute))
+
+    assert bundle.items[0].source == "claim"
+    assert bundle.items[0].content.endswith(TRUNCATION_MARKER)
+    assert bundle.tokens <= 100
+
+@patch.object(ExternalAPIs, "get_communications", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "get_chain_events", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "check_shipment_status", new_callable=AsyncMock)
+def test_separate_disputes_share_fetches(mock_shipment, mock_events, mock_messages):
+    mock_shipment.return_value = {"status": "in_transit"}
+    mock_events.return_value = []
+    mock_messages.return_value = []
+    pipeline = EvidencePipeline(token_budget=1000)
+
+    async def run():
+        await asyncio.gather(
+            pipeline.assemble({**DISPUTE, "reason": "Goods never arrived"}),
+            pipeline.assemble({**DISPUTE, "reason": "Goods arrived damaged"}),
+        )
+        await pipeline.assemble({**DISPUTE, "reason": "Seller unresponsive"})
+
+    asyncio.run(run())
+    mock_shipment.assert_called_once_with("TRK1", "fedex")
+    mock_events.assert_called_once_with("escrow-1")
+    mock_messages.assert_called_once_with("escrow-1")
+
+@patch.object(ExternalAPIs, "get_communications", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "get_chain_events", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "check_shipment_status", new_callable=AsyncMock)
+def test_shipment_cache_key_includes_provider(mock_shipment, mock_events, mock_messages):
+    mock_shipment.return_value = {"status": "in_transit"}
+    mock_events.return_value = []
+    mock_messages.return_value = []
+    pipeline = EvidencePipeline(token_budget=1000)
+    ups = {**DISPUTE, "verifiables": [{"type": "shipment", "provider": "ups", "tracking_id": "TRK1"}]}
+
+    async def run():
+        await pipeline.assemble(DISPUTE)
+        await pipeline.assemble(ups)
+
+    asyncio.run(run())
+    assert mock_shipment.call_count == 2
+
+@patch.object(ExternalAPIs, "get_communications", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "get_chain_events", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "check_shipment_status", new_callable=AsyncMock)
+def test_tiny_budget_is_never_exceeded(mock_shipment, mock_events, mock_messages):
+    mock_shipment.return_value = {"status": "in_transit"}
+    mock_events.return_value = []
+    mock_messages.return_value = []
+
+    bundle = asyncio.run(EvidencePipeline(token_budget=3).assemble(DISPUTE))
+
+    assert [item.source for item in bundle.items] == ["claim"]
+    assert not bundle.items[0].content.endswith(TRUNCATION_MARKER)
+    assert bundle.tokens <= 3
+
+def test_cache_evicts_oldest_entries_when_full():
+    async def fetch():
+        return [1]
+
+    async def run():
+        cache = EvidenceCache(ttl=60, max_entries=100)
+        for index in range(1000):
+            await cache.get_or_fetch(("k", index), fetch)
+        return cache
+
+    cache = asyncio.run(run())
+    assert len(cache) == 100
+
+def test_cache_shares_fetches():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return [1]
+
+    async def run():
+        cache = EvidenceCache(ttl=60)
+        return await asyncio.gather(*(cache.get_or_fetch(("k",), fetch) for _ in range(3)))
+
+    assert asyncio.run(run()) == [[1], [1], [1]]
+    assert len(calls) == 1
@@ -0,0 +1,167 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from ai_agent.agents import main as agents_main
+from ai_agent.config import Config
+from ai_agent.services.escrow_store import CompactVerifiable
+from ai_agent.services.monitor import ConditionMonitor
+from ai_agent.utils.external_apis import ExternalAPIs
+
+SHIPMENT = [{"type": "shipment", "provider": "fedex", "tracking_id": "TRK1"}]
+EMAIL = [{"type": "email", "email_id": "mail-1"}]
+
+def run_monitor(scenario):
+    async def run():
+        monitor = ConditionMonitor()
+        await scenario(monitor)
+        return monitor
+    return asyncio.run(run())
+
+def slow_delivery(delay):
+    async def check(tracking_id, carrier):
+        await asyncio.sleep(delay)
+        return {"status": "delivered"}
+    return check
+
+# --- ConditionMonitor ---
+
+@patch.object(ConditionMonitor, "_trigger_fund_release", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "check_email_confirmation", new_callable=AsyncMock)
+def test_release_when_conditions_met(mock_email, mock_release):
+    mock_email.return_value = {"status": "confirmed"}
+
+    async def scenario(monitor):
+        await monitor.start_monitoring("e1", EMAIL)
+        await asyncio.sleep(0.05)
+
+    monitor = run_monitor(scenario)
+    mock_email.assert_called_once_with("mail-1")
+    mock_release.assert_called_once_with("e1")
+    assert "e1" not in monitor.store
+
+@patch.object(Config, "POLLING_INTERVAL", 0.02)
+@patch.object(ConditionMonitor, "_trigger_fund_release", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "check_shipment_status", new_callable=AsyncMock)
+def test_failed_check_is_rescheduled(mock_shipment, mock_release):
+    mock_shipment.side_effect = Exception("carrier down")
+
+    async def scenario(monitor):
+        await monitor.start_monitoring("e1", SHIPMENT)
+        await asyncio.sleep(0.15)
+
+    monitor = run_monitor(scenario)
+    assert mock_shipment.call_count >= 3
+    mock_release.assert_not_called()
+    assert "e1" in monitor.store
+
+@patch.object(ConditionMonitor, "_trigger_fund_release", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "check_shipment_status", new=slow_delivery(0.2))
+def test_stop_during_check_does_not_release(mock_release):
+    async def scenario(monitor):
+        await monitor.start_monitoring("e1", SHIPMENT)
+        await asyncio.sleep(0.05)
+        await monitor.stop_monitoring("e1")
+        await asyncio.sleep(0.3)
+
+    monitor = run_monitor(scenario)
+    mock_release.assert_not_called()
+    assert "e1" not in monitor.store
+
+@patch.object(Config, "POLLING_INTERVAL", 10)
+@patch.object(ConditionMonitor, "_trigger_fund_release", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "check_email_confirmation", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "check_shipment_status", new=slow_delivery(0.2))
+def test_restart_during_check_keeps_new_registration(mock_email, mock_release):
+    mock_email.return_value = {"status": "pending"}
+
+    async def scenario(monitor):
+        await monitor.start_monitoring("e1", SHIPMENT)
+        await asyncio.sleep(0.05)
+        await monitor.stop_monitoring("e1")
+        await monitor.start_monitoring("e1", EMAIL)
+        await asyncio.sleep(0.3)
+
+    monitor = run_monitor(scenario)
+    mock_release.assert_not_called()
+    assert monitor.store.verifiables("e1")[0].type == "email"
+    assert monitor.store.status("e1") == "monitoring"
+
+@patch.object(Config, "POLLING_INTERVAL", 0.02)
+@patch.object(Config, "MONITOR_CHECK_TIMEOUT", 5)
+@patch.object(ExternalAPIs, "check_email_confirmation", new_callable=AsyncMock)
+@patch.object(ExternalAPIs, "check_shipment_status", new=slow_delivery(10))
+def test_slow_escrow_does_not_block_others(mock_email):
+    mock_email.return_value = {"status": "pending"}
+
+    async def scenario(monitor):
+        await monitor.start_monitoring("slow", SHIPMENT)
+        await monitor.start_monitoring("healthy", EMAIL)
+        await asyncio.sleep(0.3)
+
+    run_monitor(scenario)
+    assert mock_email.call_count >= 5
+
+@patch.object(Config, "POLLING_INTERVAL", 0.02)
+@patch.object(Config, "MONITOR_CHECK_TIMEOUT", 0.05)
+@patch.object(ConditionMonitor, "_trigger_fund_release", new_callable=AsyncMock)
+def test_hung_check_times_out_and_is_retried(mock_release):
+    calls = []
+
+    async def hang(tracking_id, carrier):
+        calls.append(tracking_id)
+        await asyncio.sleep(10)
+
+    async def scenario(monitor):
+        with patch.object(ExternalAPIs, "check_shipment_status", new=hang):
+            await monitor.start_monitoring("e1", SHIPMENT)
+            await asyncio.sleep(0.3)
+
+    monitor = run_monitor(scenario)
+    assert len(calls) >= 2
+    mock_release.assert_not_called()
+    assert "e1" in monitor.store
+
+def test_unknown_condition_type_is_never_met():
+    unknown = CompactVerifiable(type="whatever", provider=None, ref="ref-1")
+    assert asyncio.run(ConditionMonitor()._check_all_conditions([unknown])) is False
+
+# --- Monitor endpoint ---
+
+def test_monitor_endpoint_rejects_unverifiable_conditions():
+    client = TestClient(agents_main.app)
+    with patch.object(agents_main.condition_monitor, "start_monitoring", new_callable=AsyncMock) as mock_start:
+        for body in (
+            [],
+            [{"type": "whatever"}],
+            [{"type": "shipment"}],
+            [{"type": "shipment", "tracking_id": "TRK1"}],
+            [{"type": "oracle", "oracle_id": "oracle-1"}],
+        ):
+            response = client.post("/api/agent/monitor/escrow-1", json=body)
+            assert response.status_code == 422
+        mock_start.assert_not_called()
+
+        response = client.post("/api/agent/monitor/escrow-1", json=SHIPMENT)
+    assert response.status_code == 200
+    mock_start.assert_called_once_with("escrow-1", SHIPMENT)
+
+def test_monitor_endpoint_materializes_verifiables():
+    client = TestClient(agents_main.app)
+    verifiables = SHIPMENT + [{"type": "oracle", "oracle_id": "oracle-1", "expected_value": "delivered"}]
+    agents_main.condition_monitor.store.add("escrow-1", verifiables)
+    try:
+        response = client.get("/api/agent/monitor/escrow-1")
+    finally:
+        agents_main.condition_monitor.store.remove("escrow-1")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "monitoring"
+    assert body["verifiables"][0]["tracking_id"] == "TRK1"
+    assert body["verifiables"][1]["oracle_id"] == "oracle-1"
+    assert body["verifiables"][1]["expected_value"] == "delivered"
+
+def test_monitor_endpoint_unknown_escrow():
+    client = TestClient(agents_main.app)
+    response = client.get("/api/agent/monitor/missing")
+    assert response.status_code == 404
@@ -1,6 +1,6 @@
 import aiohttp
 import json
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from ..config import Config
 
 class ExternalAPIs:
@@ -54,4 +54,18 @@ class ExternalAPIs:
         return {
             "value": "oracle_data",
             "timestamp": "2024-04-13T00:00:00Z"
-        } 
\ No newline at end of file
+        } 
+
+    @staticmethod
+    async def get_chain_events(escrow_id: str) -> List[Dict]:
+        """Fetch escrow contract events from the blockchain"""
+        # Implementation would query the escrow contract logs via Config.BLOCKCHAIN_RPC_URL
+        # This is a placeholder for the actual implementation
+        return []
+
+    @staticmethod
+    async def get_communications(escrow_id: str) -> List[Dict]:
+        """Fetch messages exchanged between the escrow parties"""
+        # Implementation would depend on the messaging provider
+        # This is a placeholder for the actual implementation
+        return []